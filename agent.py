@@ -1,12 +1,24 @@
-﻿import json
+﻿import asyncio
+import atexit
+import hashlib
+import math
 import os
+import sqlite3
+import time
+from contextlib import closing
 from pathlib import Path
-from uuid import uuid4
-from typing import Dict, List
-from datetime import datetime
+from uuid import UUID, uuid4
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from queue import Empty, Queue
+from threading import Event, Lock, Thread, local
 
+import httpx
+from cachetools import TTLCache
 from google import genai
+from google.genai import errors
+from google.genai.chats import AsyncChat
 
+from cache import ExactCache, SemanticCache, normalize_prompt
 from logger import logger
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -16,74 +28,389 @@ if not GOOGLE_API_KEY:
         "Missing GOOGLE_API_KEY environment variable."
     )
 
+# One client per process, so every agent shares its HTTP connection pool and keep-alive connections.
+# The async pool is sized for concurrent /chat requests, timeout is in milliseconds.
+CLIENT = genai.Client(
+    api_key=GOOGLE_API_KEY,
+    http_options=genai.types.HttpOptions(
+        timeout=30_000,
+        async_client_args={
+            "limits": httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        },
+    ),
+)
+
+MODEL = "gemini-2.5-flash-lite"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "gemini-embedding-001")
+
+DEFAULT_TEMPERATURE = 0.2
+
+# The model is told to reply with exactly this sentence when the knowledge base has no answer
+RESTRICTED_ANSWER = "I cannot answer that based on the available knowledge base"
+
+# Idle chat sessions are dropped after SESSION_TTL seconds. The knowledge base context cache lives twice
+# as long and is replaced once less than SESSION_TTL remains, so a pooled session never outlives its cache.
+SESSION_TTL = 3600
+KB_CACHE_TTL = 2 * SESSION_TTL
+KB_CACHE_RETRY_DELAY = 300
+
+STORAGE_PATH = Path(__file__).parent / "chats.db"
+
+# Longest time a history read waits for queued writes before reading what is stored
+FLUSH_TIMEOUT = 10
+KNOWLEDGE_BASE_PATH = Path(__file__).parent / "fictional_knowledge_base.txt"
+
+
+def _load_knowledge_base() -> str:
+    try:
+        return KNOWLEDGE_BASE_PATH.read_text(encoding="utf-8")
+    except Exception as e:
+        logger.error("Failed to load knowledge base: %s", str(e))
+        return ""
+
+
+# Loaded once at import, so all agents share one copy, and workers forked from a preloaded app share its pages
+KNOWLEDGE_BASE = _load_knowledge_base()
+
 
 class DomainRestrictedAgent:
     """
-    Domain-restricted multi-turn chat agent with persistent JSON-based storage.
+    Domain-restricted multi-turn chat agent with persistent SQLite storage.
 
-    Storage format (chats.json):
-    {
-        "chat_id": [
-            {"role": "user", "content": "..."},
-            {"role": "assistant", "content": "..."}
-        ]
-    }
+    Storage format (chats.db, WAL mode), one row per message:
+    messages(chat_id TEXT, idx INTEGER, role TEXT, content TEXT, ts INTEGER)
+
+    chat_id is the UUID hex of the chat, idx the position of the message in the chat
+    and ts the message timestamp in unix nanoseconds.
     """
 
     def __init__(self):
-        self.client = genai.Client(api_key=GOOGLE_API_KEY)
+        self.client = CLIENT
 
-        self.storage_path = Path(__file__).parent / "chats.json"
-        
-        # Load knowledge base from file
-        knowledge_base_path = Path(__file__).parent / "fictional_knowledge_base.txt"
-        try:
-            self.knowledge_base = knowledge_base_path.read_text(encoding="utf-8")
-        except Exception as e:
-            logger.error("Failed to load knowledge base: %s", str(e))
-            self.knowledge_base = ""
+        self.storage_path = STORAGE_PATH
+        self.knowledge_base = KNOWLEDGE_BASE
+
+        # The system instruction is static and the knowledge base is sent as the first message,
+        # so the same prefix is shared by every chat and can be cached by the provider
+        self.system_instruction = f"""
+        You are a domain-restricted AI agent.
+        You MUST only answer using the knowledge base given at the start of the conversation.
+        If the answer is not found in the knowledge base, respond with:
+        "{RESTRICTED_ANSWER}."
+        """
+        self._kb_contents = [
+            genai.types.Content(
+                role="user",
+                parts=[genai.types.Part(text=f"Knowledge Base:\n{self.knowledge_base}")]
+            )
+        ]
 
-        # Ensure storage file exists
-        if not self.storage_path.exists():
-            self.storage_path.write_text("{}", encoding="utf-8")
+        # Gemini context cache holding the system instruction and knowledge base, created on first use
+        self._kb_cache_name: Optional[str] = None
+        self._kb_cache_refresh_at = 0.0
+        self._kb_cache_refreshing = False
+        self._kb_cache_lock = Lock()
+
+        # Hash of the knowledge base, used to namespace cached answers
+        self._kb_hash = hashlib.sha1(self.knowledge_base.encode("utf-8")).hexdigest()
+        self.exact_cache = ExactCache()
+        self.semantic_cache = SemanticCache(self.client, model=EMBEDDING_MODEL)
+
+        # Live chat sessions by chat ID, so continuing a chat skips reloading and re-sending its history
+        self._sessions: TTLCache = TTLCache(maxsize=1000, ttl=SESSION_TTL)
+        self._sessions_lock = Lock()
+
+        # Ensure storage database exists
+        self._init_storage()
+        self._local = local()
+
+        # Chat history is persisted by a single background writer per process, off the request path.
+        # It is started on first use, as threads do not survive the fork of a preloaded app.
+        self._write_queue: Optional[Queue] = None
+        self._writer: Optional[Thread] = None
+        self._writer_pid: Optional[int] = None
+        self._writer_lock = Lock()
+        atexit.register(self._flush_writes)
 
     # --------------------------------------------------
     # Internal Helpers
     # --------------------------------------------------
 
-    def _load_all_chats(self) -> Dict[str, List[Dict]]:
+    def _chat_key(self, chat_id: str) -> str:
+        """
+        Normalize a chat ID to the key it is stored under.
+        Raises ValueError if chat_id is not a valid UUID, including when it is None.
+        """
         try:
-            with open(self.storage_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            logger.exception("Failed loading chats.json")
+            return UUID(chat_id).hex
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"Chat with ID '{chat_id}' does not exist.") from None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are opened explicitly
+        connection = sqlite3.connect(self.storage_path, isolation_level=None)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _init_storage(self) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    chat_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    PRIMARY KEY (chat_id, idx)
+                )
+                """
+            )
+
+    def _read_connection(self) -> sqlite3.Connection:
+        """
+        Return this thread's read connection, sqlite3 connections must not be shared across threads.
+        """
+        # A connection inherited through fork must not be used, so connections are also keyed by process
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return connection
+
+    def _load_chat(self, chat_key: str) -> List[Dict]:
+        try:
+            rows = self._read_connection().execute(
+                "SELECT role, content, ts FROM messages WHERE chat_id = ? ORDER BY idx",
+                (chat_key,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.exception("Failed loading chat %s", chat_key)
             raise RuntimeError("Chat storage corrupted") from e
 
-    def _write_all_chats(self, chats: Dict[str, List[Dict]]) -> None:
+        return [{"role": role, "content": content, "timestamp": ts} for role, content, ts in rows]
+
+    def _insert_messages(self, connection: sqlite3.Connection, writes: List[Tuple[str, List[Dict]]]) -> None:
+        """
+        Insert a batch of (chat_key, messages) writes in a single transaction, so they share one commit.
+        """
         try:
-            with open(self.storage_path, "w", encoding="utf-8") as f:
-                json.dump(chats, f, indent=2)
-        except Exception as e:
-            logger.exception("Failed writing chats.json")
+            # BEGIN IMMEDIATE takes the write lock up front, so workers in other processes cannot claim the same idx
+            connection.execute("BEGIN IMMEDIATE")
+            for chat_key, messages in writes:
+                (next_idx,) = connection.execute(
+                    "SELECT COALESCE(MAX(idx) + 1, 0) FROM messages WHERE chat_id = ?",
+                    (chat_key,),
+                ).fetchone()
+                connection.executemany(
+                    "INSERT INTO messages (chat_id, idx, role, content, ts) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (chat_key, next_idx + offset, message["role"], message["content"], message["timestamp"])
+                        for offset, message in enumerate(messages)
+                    ],
+                )
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            logger.exception("Failed writing %d chat updates", len(writes))
             raise RuntimeError("Failed to persist chat history") from e
 
+    def _persist_batch(self, connection: sqlite3.Connection, writes: List[Tuple[str, List[Dict]]]) -> None:
+        """
+        Insert a batch of writes. If the shared transaction fails, each chat's write is retried on its own,
+        so one failure never drops the messages of other chats in the batch.
+        """
+        try:
+            self._insert_messages(connection, writes)
+            return
+        except RuntimeError:
+            # Already logged by _insert_messages
+            if len(writes) == 1:
+                failed = writes
+            else:
+                failed = []
+                for write in writes:
+                    try:
+                        self._insert_messages(connection, [write])
+                    except RuntimeError:
+                        failed.append(write)
+
+        # These messages are lost, so drop the pooled sessions holding them, they are rebuilt from storage next turn
+        with self._sessions_lock:
+            for chat_key, _ in failed:
+                self._sessions.pop(chat_key, None)
+
+    def _persist_worker(self, write_queue: Queue) -> None:
+        """
+        Drain the write queue, inserting messages in the order they were queued.
+        Everything queued while the previous batch was written is committed together.
+        An Event in the queue is set once every write queued before it is done.
+        """
+        connection = self._connect()
+
+        while True:
+            items = [write_queue.get()]
+            while True:
+                try:
+                    items.append(write_queue.get_nowait())
+                except Empty:
+                    break
+
+            writes = [item for item in items if not isinstance(item, Event)]
+            try:
+                if writes:
+                    self._persist_batch(connection, writes)
+            finally:
+                for item in items:
+                    if isinstance(item, Event):
+                        item.set()
+                    write_queue.task_done()
+
+    def _get_write_queue(self) -> Queue:
+        """
+        Return the write queue of this process, starting its writer thread if it is not running.
+        """
+        with self._writer_lock:
+            if self._writer_pid != os.getpid() or not self._writer.is_alive():
+                if self._writer_pid == os.getpid():
+                    logger.error("Chat writer thread died, starting a new one")
+                self._write_queue = Queue()
+                self._writer = Thread(target=self._persist_worker, args=(self._write_queue,), name="chat-writer", daemon=True)
+                self._writer.start()
+                self._writer_pid = os.getpid()
+            return self._write_queue
+
+    def _flush_writes(self) -> None:
+        """
+        Block until all writes queued so far by this process are persisted, at most FLUSH_TIMEOUT seconds.
+        """
+        with self._writer_lock:
+            if self._writer_pid != os.getpid() or not self._writer.is_alive():
+                # This process has no running writer, so nothing it queued can still be persisted
+                return
+            write_queue = self._write_queue
+
+        flushed = Event()
+        write_queue.put(flushed)
+        if not flushed.wait(timeout=FLUSH_TIMEOUT):
+            logger.warning("Timed out after %ss waiting for chat writes to be persisted", FLUSH_TIMEOUT)
+
     def _convert_history_to_genai_format(self, history: List[Dict]) -> List[genai.types.Content]:
         """
         Convert stored chat history into Google GenAI Content objects.
         Ensures compatibility with chats.create().
+        Only needed when a chat's session is not in the session pool, live sessions keep their own history.
         """
+        return [
+            genai.types.Content(
+                role=message["role"],
+                parts=[genai.types.Part(text=message["content"])]
+            )
+            for message in history
+        ]
 
-        converted = []
+    async def _get_kb_cache(self) -> Optional[str]:
+        """
+        Return the name of the context cache holding the system instruction and knowledge base,
+        creating or replacing it when needed.
+        Returns None if context caching is unavailable, in which case both are sent inline.
 
-        for message in history:
-            converted.append(
-                genai.types.Content(
-                    role=message["role"],
-                    parts=[genai.types.Part(text=message["content"])]
-                )
+        Only the turn that claims the refresh waits for caches.create, other turns keep
+        using the current cache, or the inline fallback while the first cache is created.
+        """
+        with self._kb_cache_lock:
+            if self._kb_cache_refreshing or time.monotonic() < self._kb_cache_refresh_at:
+                return self._kb_cache_name
+            self._kb_cache_refreshing = True
+
+        try:
+            cache = await self.client.aio.caches.create(
+                model=MODEL,
+                config=genai.types.CreateCachedContentConfig(
+                    system_instruction=self.system_instruction,
+                    contents=self._kb_contents,
+                    ttl=f"{KB_CACHE_TTL}s",
+                ),
+            )
+        except errors.ClientError as e:
+            self._kb_cache_name = None
+            if e.code == 400:
+                # Invalid requests, such as content below the model's minimum cache size, will not succeed on retry
+                logger.warning("Knowledge base context caching rejected, sending it inline: %s", str(e))
+                self._kb_cache_refresh_at = math.inf
+            else:
+                # Rate limits and other client errors may clear, so retry later
+                logger.warning("Knowledge base context caching unavailable, sending it inline: %s", str(e))
+                self._kb_cache_refresh_at = time.monotonic() + KB_CACHE_RETRY_DELAY
+            return None
+        except Exception as e:
+            logger.warning("Knowledge base context caching unavailable, sending it inline: %s", str(e))
+            self._kb_cache_name = None
+            self._kb_cache_refresh_at = time.monotonic() + KB_CACHE_RETRY_DELAY
+            return None
+        finally:
+            self._kb_cache_refreshing = False
+
+        replaced_name = self._kb_cache_name
+        self._kb_cache_name = cache.name
+        self._kb_cache_refresh_at = time.monotonic() + KB_CACHE_TTL - SESSION_TTL
+        logger.info("Created knowledge base context cache %s", cache.name)
+
+        # Pooled sessions referencing the replaced cache are rebuilt on their next turn, so it can go
+        if replaced_name is not None:
+            try:
+                await self.client.aio.caches.delete(name=replaced_name)
+            except Exception as e:
+                logger.warning("Failed deleting knowledge base context cache %s: %s", replaced_name, str(e))
+
+        return cache.name
+
+    def _create_session(self, history_json: List[Dict], temperature: float, kb_cache: Optional[str]) -> AsyncChat:
+        """
+        Create a chat session from stored history, referencing the knowledge base context cache if there is one.
+        """
+        history = self._convert_history_to_genai_format(history_json)
+
+        if kb_cache is not None:
+            config = genai.types.GenerateContentConfig(
+                temperature=temperature,
+                cached_content=kb_cache,
+            )
+        else:
+            config = genai.types.GenerateContentConfig(
+                temperature=temperature,
+                system_instruction=self.system_instruction,
             )
+            history = self._kb_contents + history
+
+        return self.client.aio.chats.create(
+            model=MODEL,
+            config=config,
+            history=history,
+        )
+
+    def _checkout_session(self, chat_key: str) -> Optional[Dict]:
+        """
+        Take a pooled session out of the pool, so concurrent messages to the same chat never share it.
+        Pooled sessions are keyed by the normalized chat ID from _chat_key().
+        Returns None if the chat has no live session.
+        """
+        with self._sessions_lock:
+            return self._sessions.pop(chat_key, None)
 
-        return converted
+    def _checkin_session(self, chat_key: str, chat_session: AsyncChat, temperature: float, kb_cache: Optional[str], history: List[Dict]) -> None:
+        """
+        Return a session to the pool together with its config and the history it holds.
+        """
+        with self._sessions_lock:
+            self._sessions[chat_key] = {
+                "session": chat_session,
+                "temperature": temperature,
+                "kb_cache": kb_cache,
+                "history": history,
+            }
 
     # --------------------------------------------------
     # Public Methods
@@ -92,106 +419,239 @@ class DomainRestrictedAgent:
     def get_chat_history(self, chat_id: str) -> List[Dict]:
         """
         Retrieve chat history by ID.
+        Always read from storage, as with several worker processes another worker may have handled
+        turns that the session pool of this process does not hold.
         Raises ValueError if chat does not exist.
         """
-        chats = self._load_all_chats()
+        chat_key = self._chat_key(chat_id)
+
+        # Make sure messages queued for this chat are stored before reading it
+        self._flush_writes()
 
-        if chat_id not in chats:
+        history = self._load_chat(chat_key)
+
+        if not history:
             raise ValueError(f"Chat with ID '{chat_id}' does not exist.")
 
-        return chats[chat_id]
+        return history
 
-    def save_chat_history(self, chat_id: str, history: List[Dict]) -> None:
+    def append_chat_history(self, chat_id: str, messages: List[Dict]) -> None:
         """
-        Persist updated chat history.
+        Queue new messages to be inserted by the background writer.
+        Only the new messages are written, the existing history is never read or rewritten.
         """
-        # TODO: For scaling considerations, store chats and history more efficiently in sql database, postgres or mssql or similar. For now, we read and write the entire JSON file for simplicity.
-        chats = self._load_all_chats()
-        chats[chat_id] = history
-        self._write_all_chats(chats)
+        self._get_write_queue().put((self._chat_key(chat_id), messages))
 
-    def chat(self, prompt: str, chat_id: str = "New", temperature: float = 0.2) -> Dict:
+    async def _start_turn(self, prompt: str, chat_id: str, temperature: Optional[float]) -> Dict:
         """
-        Chat interface.
-
-        If chat_id == "New":
-            - Generates new UUID
-            - Creates new empty history
-
-        Otherwise:
-            - Loads existing history
-            - Raises ValueError if not found
-
-        Returns:
-        {
-            "chat_id": str,
-            "answer": str
-        }
+        Initialize or load the chat and look the prompt up in the caches.
+        Raises ValueError if chat_id does not exist.
         """
 
+        # Requests may send null, the cache keys and the session pool compare the resolved value
+        if temperature is None:
+            temperature = DEFAULT_TEMPERATURE
+
         # --------------------------------------------------
         # Initialize or Load Chat
         # --------------------------------------------------
 
+        pooled = None
+
         if chat_id == "New":
-            chat_id = str(uuid4())
+            chat_id = uuid4().hex
             history_json=[]
-            history = None
             logger.info("Creating new chat with ID %s", chat_id)
         else:
-            history_json = self.get_chat_history(chat_id)
-            history = self._convert_history_to_genai_format(history_json)
+            # The pool is keyed like storage, so every spelling of a chat ID maps to the same session
+            chat_key = self._chat_key(chat_id)
+            pooled = self._checkout_session(chat_key)
+            if pooled is None:
+                history_json = await asyncio.to_thread(self.get_chat_history, chat_id)
+            else:
+                history_json = pooled["history"]
+            chat_id = chat_key
+
+        turn = {
+            "chat_id": chat_id,
+            "history": history_json,
+            "pooled": pooled,
+            "temperature": temperature,
+            "exact_key": None,
+            "embedding": None,
+            "cached_answer": None,
+            "prompt_timestamp": time.time_ns(),
+        }
 
         # --------------------------------------------------
-        # System Instruction
+        # Semantic Cache
         # --------------------------------------------------
 
-        system_instruction = f"""
-        You are a domain-restricted AI agent.
-        You MUST only answer using the knowledge base below.
-        If the answer is not found in the knowledge base, respond with:
-        "I cannot answer that based on the available knowledge base."
+        # Only the first message of a chat is cached, as later answers depend on the history.
+        if not history_json:
+            turn["semantic_namespace"] = (self._kb_hash, round(temperature, 2))
+            turn["exact_key"] = (self._kb_hash, normalize_prompt(prompt), round(temperature, 2))
+            turn["cached_answer"] = self.exact_cache.get(turn["exact_key"])
 
-        Knowledge Base:
-        {self.knowledge_base}
-        """
+            if turn["cached_answer"] is None:
+                turn["embedding"] = await self.semantic_cache.embed(prompt)
+                if turn["embedding"] is not None:
+                    turn["cached_answer"] = self.semantic_cache.search(turn["semantic_namespace"], turn["embedding"])
 
-        try:
-            # Create chat session
-            # TODO: persist chat session in memory, in order to avoid reinitialization on every message. Look into ways to persist chats efficiently. Probably miniscule gains in efficiency, when compared to chat response time.
-            chat_session = self.client.chats.create(
-                model="gemini-2.5-flash-lite",
-                config=genai.types.GenerateContentConfig(
-                    temperature=temperature,
-                    system_instruction=system_instruction,
-                ),
-                history=history, 
-            )
+        return turn
+
+    async def _open_session(self, turn: Dict) -> AsyncChat:
+        """
+        Return the session to send the turn's prompt to.
+        Reuses the pooled session, unless its config is outdated, as a session's config is fixed.
+        """
+        turn["kb_cache"] = await self._get_kb_cache()
+        pooled = turn["pooled"]
 
-            # Send new prompt
-            promt_timestamp = datetime.utcnow().isoformat()
-            response = chat_session.send_message(prompt)
-            response_timestamp = datetime.utcnow().isoformat()
+        if pooled is not None and pooled["temperature"] == turn["temperature"] and pooled["kb_cache"] == turn["kb_cache"]:
+            return pooled["session"]
 
-            answer = response.text.strip()
+        return self._create_session(turn["history"], turn["temperature"], turn["kb_cache"])
 
-        except Exception as e:
-            logger.exception("Model generation failed")
-            raise RuntimeError("AI model failed") from e
+    def _finish_turn(self, turn: Dict, prompt: str, answer: str, chat_session: Optional[AsyncChat] = None) -> None:
+        """
+        Persist the turn's messages. For model answers, also cache the answer and return the session to the pool.
+        """
 
         # --------------------------------------------------
         # Update History Locally
         # --------------------------------------------------
 
         # TODO: Handle content better, for example if the model returns multiple parts, or if we want to store metadata about each message. For now we just store the raw text.
-        updated_history = history_json + [
-            {"role": "user", "content": prompt, "timestamp": promt_timestamp},
-            {"role": "model", "content": answer, "timestamp": response_timestamp},
+        new_messages = [
+            {"role": "user", "content": prompt, "timestamp": turn["prompt_timestamp"]},
+            {"role": "model", "content": answer, "timestamp": time.time_ns()},
         ]
+        self.append_chat_history(turn["chat_id"], new_messages)
+
+        if chat_session is None:
+            return
+
+        if turn["exact_key"] is not None:
+            self.exact_cache.set(turn["exact_key"], answer)
+        if turn["embedding"] is not None:
+            self.semantic_cache.add(turn["semantic_namespace"], turn["embedding"], answer)
+
+        # The history is owned by this turn, freshly loaded or checked out of the pool, so it is extended in place
+        history_json = turn["history"]
+        history_json.extend(new_messages)
+        self._checkin_session(turn["chat_id"], chat_session, turn["temperature"], turn["kb_cache"], history_json)
+
+    async def _stream_cached_turn(self, turn: Dict, prompt: str) -> AsyncIterator[str]:
+        self._finish_turn(turn, prompt, turn["cached_answer"])
+        yield turn["cached_answer"]
+
+    async def _stream_turn(
+        self, turn: Dict, prompt: str, chat_session: AsyncChat, stream: AsyncIterator, first_chunk: str
+    ) -> AsyncIterator[str]:
+        chunks = [first_chunk]
+        yield first_chunk
+
+        try:
+            async for chunk in stream:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+
+            answer = "".join(chunks).strip()
+            if not answer:
+                raise RuntimeError("Model returned an empty answer")
 
-        self.save_chat_history(chat_id, updated_history)
+        except Exception as e:
+            logger.exception("Model generation failed")
+            raise RuntimeError("AI model failed") from e
+
+        self._finish_turn(turn, prompt, answer, chat_session)
+
+    async def chat(self, prompt: str, chat_id: str = "New", temperature: Optional[float] = DEFAULT_TEMPERATURE) -> Dict:
+        """
+        Async chat interface, the model is called through the async GenAI client.
+
+        If chat_id == "New":
+            - Generates new UUID
+            - Creates new empty history
+
+        Otherwise:
+            - Reuses the live session if the chat is in the session pool
+            - Loads existing history
+            - Raises ValueError if not found
+
+        The first message of a new chat is looked up in the exact cache, then
+        the semantic cache, and answered from them if the same or a similar
+        question was answered before.
+
+        Returns:
+        {
+            "chat_id": str,
+            "answer": str
+        }
+        """
+        turn = await self._start_turn(prompt, chat_id, temperature)
+
+        if turn["cached_answer"] is not None:
+            self._finish_turn(turn, prompt, turn["cached_answer"])
+            return {
+                "chat_id": turn["chat_id"],
+                "answer": turn["cached_answer"],
+            }
+
+        try:
+            chat_session = await self._open_session(turn)
+            response = await chat_session.send_message(prompt)
+            answer = response.text.strip()
+
+            # E.g. a safety block, which must not be persisted or cached as an answer
+            if not answer:
+                raise RuntimeError("Model returned an empty answer")
+
+        except Exception as e:
+            logger.exception("Model generation failed")
+            raise RuntimeError("AI model failed") from e
+
+        self._finish_turn(turn, prompt, answer, chat_session)
 
         return {
-            "chat_id": chat_id,
+            "chat_id": turn["chat_id"],
             "answer": answer,
         }
+
+    async def chat_stream(self, prompt: str, chat_id: str = "New", temperature: Optional[float] = DEFAULT_TEMPERATURE) -> Tuple[str, AsyncIterator[str]]:
+        """
+        Streaming chat interface, same behaviour as chat().
+
+        The chat is loaded and the first text chunk received before returning, so a missing
+        chat raises ValueError, and a failed or empty answer RuntimeError, here rather than
+        mid-stream. The answer is persisted once the stream is exhausted.
+
+        Returns:
+            (chat_id, async iterator of answer text chunks)
+        """
+        turn = await self._start_turn(prompt, chat_id, temperature)
+
+        if turn["cached_answer"] is not None:
+            return turn["chat_id"], self._stream_cached_turn(turn, prompt)
+
+        try:
+            chat_session = await self._open_session(turn)
+            stream = (await chat_session.send_message_stream(prompt)).__aiter__()
+
+            first_chunk = None
+            async for chunk in stream:
+                if chunk.text:
+                    first_chunk = chunk.text
+                    break
+
+            # E.g. a safety block, which must not be persisted or cached as an answer
+            if first_chunk is None:
+                raise RuntimeError("Model returned an empty answer")
+
+        except Exception as e:
+            logger.exception("Model generation failed")
+            raise RuntimeError("AI model failed") from e
+
+        return turn["chat_id"], self._stream_turn(turn, prompt, chat_session, stream, first_chunk)
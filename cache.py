@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from google import genai
+from google.genai import errors
+
+from logger import logger
+
+
+# Rows a semantic cache namespace starts with before growing towards maxsize
+INITIAL_CAPACITY = 16
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for cache keying: lowercase and collapse whitespace.
+    """
+    return " ".join(prompt.lower().split())
+
+
+class SemanticCache:
+    """
+    In-memory semantic cache of model answers.
+
+    Prompts are embedded with the Gemini embedding model and stored as unit
+    vectors, so a dot product equals cosine similarity (same semantics as a
+    FAISS IndexFlatIP). Entries are grouped by namespace, which the agent sets
+    to the knowledge base hash and rounded temperature, so editing the
+    knowledge base busts the cache.
+
+    Each namespace keeps its vectors in one contiguous matrix, so a search is a
+    single vectorized matrix-vector product and never stalls the event loop it
+    runs on. The matrix doubles as entries arrive, and once it holds maxsize
+    entries it is used as a ring buffer.
+    """
+
+    def __init__(
+        self,
+        client: genai.Client,
+        model: str = "gemini-embedding-001",
+        dimensions: int = 768,
+        threshold: float = 0.9,
+        maxsize: int = 1024,
+    ):
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.threshold = threshold
+        self.maxsize = maxsize
+
+        # Set when the embedding model rejects requests, e.g. because it does not exist
+        self._disabled = False
+
+        self._entries: Dict[Hashable, Dict] = {}
+        self._lock = Lock()
+
+    # --------------------------------------------------
+    # Internal Helpers
+    # --------------------------------------------------
+
+    @staticmethod
+    def _to_unit_vector(values: List[float]) -> np.ndarray:
+        vector = np.asarray(values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return vector
+        return vector / norm
+
+    # --------------------------------------------------
+    # Public Methods
+    # --------------------------------------------------
+
+    async def embed(self, prompt: str) -> Optional[np.ndarray]:
+        """
+        Embed a normalized prompt.
+        Returns None if the embedding call fails, so callers can fall back to the model.
+        A rejected request (4xx other than rate limiting) disables the semantic cache.
+        """
+        if self._disabled:
+            return None
+
+        try:
+            response = await self.client.aio.models.embed_content(
+                model=self.model,
+                contents=normalize_prompt(prompt),
+                config=genai.types.EmbedContentConfig(output_dimensionality=self.dimensions),
+            )
+            return self._to_unit_vector(response.embeddings[0].values)
+        except errors.ClientError as e:
+            if e.code == 429:
+                logger.warning("Embedding rate limited, skipping semantic cache: %s", str(e))
+            else:
+                logger.warning("Embedding model %s rejected the request, disabling semantic cache: %s", self.model, str(e))
+                self._disabled = True
+            return None
+        except Exception as e:
+            logger.warning("Embedding failed, skipping semantic cache: %s", str(e))
+            return None
+
+    def search(self, namespace: Hashable, embedding: np.ndarray) -> Optional[str]:
+        """
+        Return the cached answer of the most similar prompt in the namespace,
+        or None if no entry reaches the similarity threshold.
+        """
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if entries is None or entries["size"] == 0:
+                return None
+
+            scores = entries["vectors"][:entries["size"]] @ embedding
+            best = int(np.argmax(scores))
+            best_score = float(scores[best])
+            best_answer = entries["answers"][best]
+
+        if best_score >= self.threshold:
+            logger.info("Semantic cache hit (similarity=%.3f)", best_score)
+            return best_answer
+
+        return None
+
+    def add(self, namespace: Hashable, embedding: np.ndarray, answer: str) -> None:
+        """
+        Store an answer under its prompt embedding, overwriting the oldest entry when full.
+        """
+        with self._lock:
+            entries = self._entries.get(namespace)
+            if entries is None:
+                entries = self._entries[namespace] = {
+                    "vectors": np.empty((min(INITIAL_CAPACITY, self.maxsize), embedding.shape[0]), dtype=np.float32),
+                    "answers": [],
+                    "size": 0,
+                    "next": 0,
+                }
+
+            vectors = entries["vectors"]
+            size = entries["size"]
+
+            if size < self.maxsize:
+                # Grow by doubling, so sparsely used namespaces stay small
+                if size == len(vectors):
+                    vectors = np.empty((min(2 * len(vectors), self.maxsize), vectors.shape[1]), dtype=np.float32)
+                    vectors[:size] = entries["vectors"]
+                    entries["vectors"] = vectors
+                slot = size
+                entries["answers"].append(answer)
+                entries["size"] = size + 1
+            else:
+                # Full, rows were filled in order, so "next" is always the oldest entry
+                slot = entries["next"]
+                entries["answers"][slot] = answer
+                entries["next"] = (slot + 1) % self.maxsize
+
+            vectors[slot] = embedding
+
+
+class ExactCache:
+    """
+    Thread-safe LRU cache of model answers keyed on exact, normalized prompts.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+
+        self._entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Tuple) -> Optional[str]:
+        """
+        Return the cached answer for the key, or None on a miss.
+        """
+        with self._lock:
+            answer = self._entries.get(key)
+            if answer is not None:
+                self._entries.move_to_end(key)
+            return answer
+
+    def set(self, key: Tuple, answer: str) -> None:
+        """
+        Store an answer, evicting the least recently used entry when full.
+        """
+        with self._lock:
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
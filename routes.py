@@ -1,13 +1,14 @@
 import os
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, List
 
 from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
-from agent import DomainRestrictedAgent
+from agent import RESTRICTED_ANSWER, DomainRestrictedAgent
 from logger import logger
 
 
@@ -31,6 +32,8 @@ app = FastAPI(
 # --------------------------------------------------
 
 class ChatRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     question: str = Field(
         ...,
         min_length=3,
@@ -48,10 +51,6 @@ class ChatRequest(BaseModel):
         description="Model creativity parameter."
     )
 
-    @field_validator("question")
-    def strip_whitespace(cls, v):
-        return v.strip()
-
 
 class ChatResponse(BaseModel):
     chat_id: str
@@ -70,6 +69,13 @@ class ChatMessage(BaseModel):
     content: str
     timestamp: str
 
+    @field_validator("timestamp", mode="before")
+    def format_timestamp(cls, v):
+        # Stored as unix nanoseconds and only formatted when history is read
+        if isinstance(v, int):
+            return datetime.fromtimestamp(v / 1e9, tz=timezone.utc).isoformat()
+        return v
+
 
 class ChatHistoryResponse(BaseModel):
     chat_id: str
@@ -119,7 +125,7 @@ def overridden_redoc():
         502: {"description": "AI provider error"}, #TODO: Include gateway timeout, and other 502 reasons, that could arise from infrastructure.
     },
 )
-def chat(request: ChatRequest):
+async def chat(request: ChatRequest):
     """
     Chat endpoint.
 
@@ -131,7 +137,7 @@ def chat(request: ChatRequest):
     logger.info("Received question: %s (chat_id=%s)", request.question, request.chat_id)
 
     try:
-        result = agent.chat(
+        result = await agent.chat(
             prompt=request.question,
             chat_id=request.chat_id,
             temperature=request.temperature,
@@ -140,7 +146,7 @@ def chat(request: ChatRequest):
         answer = result["answer"]
         chat_id = result["chat_id"]
 
-        restricted = "cannot answer" in answer.lower()
+        restricted = answer.startswith(RESTRICTED_ANSWER)
 
         return ChatResponse(
             chat_id=chat_id,
@@ -168,6 +174,62 @@ def chat(request: ChatRequest):
         )
 
 
+@app.post(
+    "/chat/stream",
+    response_class=StreamingResponse,
+    summary="Stream a message to the AI agent",
+    description="Creates a new chat or continues an existing one, streaming the answer as plain text. The chat ID is returned in the X-Chat-Id header.",
+    tags=["Chat"],
+    responses={
+        200: {"content": {"text/plain": {}}, "description": "Streamed answer"},
+        404: {"description": "Chat not found"},
+        500: {"description": "Internal server error"},
+        502: {"description": "AI provider error"},
+    },
+)
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint.
+
+    - Same behaviour as POST /chat, but sends answer chunks as the model generates them
+    - History is persisted once the answer is complete
+    """
+
+    logger.info("Received streaming question: %s (chat_id=%s)", request.question, request.chat_id)
+
+    try:
+        chat_id, chunks = await agent.chat_stream(
+            prompt=request.question,
+            chat_id=request.chat_id,
+            temperature=request.temperature,
+        )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+    except RuntimeError:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="AI provider error",
+        )
+
+    except Exception:
+        logger.exception("Unexpected error")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+    return StreamingResponse(
+        chunks,
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Chat-Id": chat_id},
+    )
+
+
 @app.get(
     "/chat/{chat_id}",
     response_model=ChatHistoryResponse,
@@ -182,6 +244,8 @@ def chat(request: ChatRequest):
 def get_chat_history(chat_id: str):
     """
     Returns stored chat history including timestamps.
+
+    Kept sync, so FastAPI runs the blocking disk read in its threadpool.
     """
 
     try: